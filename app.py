@@ -7,7 +7,10 @@ genera un reporte utilizando un modelo de IA (Gemini).
 """
 import streamlit as st
 import pandas as pd
+import numpy as np
 import os
+import io
+import hashlib
 from dotenv import load_dotenv
 
 # Importar nuestros módulos
@@ -21,6 +24,103 @@ st.set_page_config(page_title="Auto Data Analyst AI", layout="wide", page_icon="
 # Carga las variables de entorno desde un archivo .env si existe.
 load_dotenv()
 
+# --- Funciones cacheadas ---
+# Streamlit re-ejecuta el script completo en cada interacción; estas funciones
+# evitan repetir la carga y el análisis mientras el archivo no cambie.
+
+# Número de archivos distintos cuyos resultados se conservan en caché.
+MAX_CACHED_UPLOADS = 4
+
+# Filas máximas usadas para las gráficas de distribución y el mapa de nulos.
+PLOT_SAMPLE_SIZE = 100_000
+
+@st.cache_resource(show_spinner=False, max_entries=MAX_CACHED_UPLOADS)
+def load_dataset(file_key, _file_bytes):
+    """
+    Carga y valida el CSV directamente desde sus bytes en memoria.
+
+    La clave de caché es `file_key` (hash del contenido); los bytes no se
+    vuelven a hashear en cada re-ejecución (prefijo `_`). El resultado se
+    comparte sin copiarlo en cada re-ejecución, por lo que la app lo trata
+    como de solo lectura.
+
+    Returns:
+        tuple or None: (df, num_cols, cat_cols, cat_cardinality, cat_value_counts,
+            num_array) si el archivo es válido, None en caso contrario.
+    """
+    loader = DataLoader(io.BytesIO(_file_bytes))
+    if not loader.load_and_validate():
+        return None
+    return loader.get_data()
+
+
+@st.cache_resource(show_spinner=False, max_entries=MAX_CACHED_UPLOADS)
+def plot_sample(file_key, _df, _num_array):
+    """
+    Muestra uniforme (en el orden original) de hasta PLOT_SAMPLE_SIZE filas para graficar.
+
+    Con 100k puntos los histogramas, boxplots y el mapa de nulos son visualmente
+    idénticos a los del dataset completo. Las estadísticas siguen usando todo `df`.
+
+    Returns:
+        tuple: (df_plot, num_array_plot) con las mismas filas.
+    """
+    n_rows = len(_df)
+    if n_rows <= PLOT_SAMPLE_SIZE:
+        return _df, _num_array
+    rng = np.random.default_rng(0)
+    rows = np.sort(rng.choice(n_rows, PLOT_SAMPLE_SIZE, replace=False))
+    return _df.iloc[rows], _num_array[rows]
+
+
+@st.cache_data(show_spinner=False, max_entries=MAX_CACHED_UPLOADS)
+def compute_stats(file_key, _df, num_cols, cat_cols, _num_array, _value_counts):
+    """
+    Calcula las estadísticas del dataset identificado por `file_key`.
+
+    El DataFrame no forma parte de la clave de caché (prefijo `_`) para no
+    tener que hashearlo en cada re-ejecución; `file_key` lo identifica.
+
+    Returns:
+        tuple: (missing_series, top_corrs, corr_matrix, total_outliers, cat_modes).
+    """
+    stats = StatsAnalyzer(_df, num_cols, cat_cols, _num_array, _value_counts) # Instancia del analizador
+    top_corrs, corr_matrix = stats.calculate_correlations()
+    return (
+        stats.get_missing_percentage(),
+        top_corrs,
+        corr_matrix,
+        stats.count_outliers_iqr(),
+        stats.get_categorical_modes(),
+    )
+
+
+# Las figuras se cachean ya renderizadas como PNG (bytes inmutables que cada
+# sesión recibe por separado) usando `file_key` como huella del DataFrame;
+# los argumentos con prefijo `_` no se hashean.
+
+@st.cache_data(show_spinner=False, max_entries=MAX_CACHED_UPLOADS)
+def missing_heatmap_png(file_key, _viz, _df):
+    """PNG cacheado del mapa de valores faltantes."""
+    return _viz.figure_to_png(_viz.create_missing_heatmap(_df), close=True)
+
+
+@st.cache_data(show_spinner=False, max_entries=MAX_CACHED_UPLOADS)
+def correlation_heatmap_png(file_key, _viz, _corr_matrix):
+    """PNG cacheado de la matriz de correlación."""
+    return _viz.figure_to_png(_viz.create_correlation_heatmap(_corr_matrix), close=True)
+
+
+@st.cache_data(show_spinner=False, max_entries=MAX_CACHED_UPLOADS)
+def column_pngs(file_key, num_cols, cat_cols, _viz, _df, _num_array, _value_counts):
+    """
+    PNGs cacheados de las gráficas por columna, renderizados en procesos paralelos.
+
+    Returns:
+        tuple: (PNGs de distribución numérica, PNGs de frecuencia categórica).
+    """
+    return _viz.render_all(_df, num_cols, cat_cols, _num_array, _value_counts)
+
 # --- SIDEBAR: Configuración ---
 st.sidebar.header("⚙️ Configuración")
 
@@ -55,33 +155,28 @@ uploaded_file = st.file_uploader("Sube tu archivo CSV", type=["csv"])
 
 # Si se ha subido un archivo, comienza el proceso de análisis.
 if uploaded_file is not None:
-    # Se guarda el archivo temporalmente para poder ser leído por pandas.
-    temp_filename = uploaded_file.name
-    with open(temp_filename, "wb") as f:
-        f.write(uploaded_file.getbuffer())
+    file_bytes = uploaded_file.getvalue()
+    file_key = hashlib.sha256(file_bytes).hexdigest()
 
     # Bloque principal de ejecución con manejo de errores.
     try:
         # --- A. Carga y Validación ---
         with st.spinner('Cargando y validando datos...'):
-            loader = DataLoader(temp_filename)
-            if loader.load_and_validate():
+            dataset = load_dataset(file_key, file_bytes)
+            if dataset is not None:
                 st.success(f"✅ Archivo cargado exitosamente: {uploaded_file.name}")
-                df, num_cols, cat_cols = loader.get_data()
+                df, num_cols, cat_cols, cat_cardinality, cat_value_counts, num_array = dataset
             else:
                 # Detiene la ejecución si el archivo no cumple con el tamaño mínimo.
                 st.error("❌ El archivo no cumple con los requisitos mínimos (Filas < 2000 o Cols < 10).")
                 st.stop()
 
         # --- B. Análisis Estadístico ---
-        stats = StatsAnalyzer(df, num_cols, cat_cols) # Instancia del analizador
-        
-        # Cálculos
-        missing_series = stats.get_missing_percentage()
+        missing_series, top_corrs, corr_matrix, total_outliers, cat_modes = compute_stats(
+            file_key, df, num_cols, cat_cols, num_array, cat_value_counts
+        )
+        df_plot, num_array_plot = plot_sample(file_key, df, num_array)
         missing_avg = missing_series.mean() if not missing_series.empty else 0
-        top_corrs, corr_matrix = stats.calculate_correlations()
-        total_outliers = stats.count_outliers_iqr()
-        cat_modes = stats.get_categorical_modes()
 
         # Mostrar KPIs (Key Performance Indicators) Generales del Dataset
         st.markdown("### 📈 Resumen General")
@@ -127,29 +222,33 @@ if uploaded_file is not None:
             col_a, col_b = st.columns(2)
             with col_a:
                 st.markdown("**Valores Faltantes**")
-                fig_miss = viz.create_missing_heatmap(df)
-                st.pyplot(fig_miss)
+                st.image(missing_heatmap_png(file_key, viz, df_plot), width="stretch")
             with col_b:
                 st.markdown("**Matriz de Correlación**")
                 if corr_matrix is not None:
-                    fig_corr = viz.create_correlation_heatmap(corr_matrix)
-                    st.pyplot(fig_corr)
+                    st.image(correlation_heatmap_png(file_key, viz, corr_matrix), width="stretch")
                 else:
                     st.warning("No hay suficientes datos numéricos.")
 
+        # Cardinalidades precalculadas al cargar: no se recorren las columnas.
+        valid_cats = [c for c, n in cat_cardinality.items() if n <= 20]
+        # Las distribuciones usan la muestra; las frecuencias, los conteos del dataset completo.
+        num_pngs, cat_pngs = column_pngs(
+            file_key, tuple(num_cols), tuple(valid_cats), viz, df_plot, num_array_plot, cat_value_counts
+        )
+
         # Pestaña 2: Histogramas y Boxplots para cada variable numérica.
         with tab2:
             st.markdown("**Top Variables Numéricas**")
-            for col in num_cols:
-                st.pyplot(viz.create_numerical_distributions(df, col))
+            for png in num_pngs:
+                st.image(png, width="stretch")
         
         # Pestaña 3: Gráficos de barras para variables categóricas con baja cardinalidad.
         with tab3:
             st.markdown("**Top Variables Categóricas**")
-            valid_cats = [c for c in cat_cols if df[c].nunique() <= 20]
             if valid_cats:
-                for col in valid_cats:
-                    st.pyplot(viz.create_categorical_count(df, col))
+                for png in cat_pngs:
+                    st.image(png, width="stretch")
             else:
                 st.info("No hay variables aptas para graficar.")
 
@@ -161,7 +260,7 @@ if uploaded_file is not None:
         col_gen, col_info = st.columns([1, 2])
         
         with col_gen:
-            generate_btn = st.button("Generar Insights con Gemini", type="primary", use_container_width=True)
+            generate_btn = st.button("Generar Insights con Gemini", type="primary", width="stretch")
         
         # Si el usuario hace clic en el botón de generar.
         if generate_btn:
@@ -170,23 +269,29 @@ if uploaded_file is not None:
                 st.error("⚠️ Falta la API Key. Configúrala en el menú lateral.")
             else:
                 with st.spinner(f"Analizando datos con {selected_model}..."):
-                    # Instanciar y llamar al generador de reportes.
-                    reporter = AIReporter(user_api_key, selected_model)
-                    report_content, saved_path = reporter.generate_report(
-                        dataset_name=uploaded_file.name,
-                        shape=df.shape,
-                        missing_percent=missing_avg,
-                        outliers=total_outliers,
-                        top_corr=top_corrs,
-                        cat_modes=cat_modes
-                    )
+                    # Reutiliza el generador de reportes de la sesión mientras no cambien
+                    # la API Key ni el modelo, conservando su conexión con Gemini.
+                    reporter_key = (user_api_key, selected_model)
+                    reporter = st.session_state.get("reporter")
+                    if reporter is None or st.session_state.get("reporter_key") != reporter_key:
+                        reporter = AIReporter(*reporter_key)
+                        st.session_state["reporter"] = reporter
+                        st.session_state["reporter_key"] = reporter_key
+                    # La respuesta de Gemini se muestra conforme llegan los fragmentos.
+                    with st.container(border=True):
+                        report_content = st.write_stream(reporter.stream_report(
+                            dataset_name=uploaded_file.name,
+                            shape=df.shape,
+                            missing_percent=missing_avg,
+                            outliers=total_outliers,
+                            top_corr=top_corrs,
+                            cat_modes=cat_modes
+                        ))
+                    saved_path = reporter.last_report_path
                     
                     # Si el reporte se genera correctamente.
                     if saved_path:
                         st.success("¡Análisis completado!")
-                        # Mostrar el contenido del reporte en la app.
-                        with st.container(border=True):
-                            st.markdown(report_content)
                         # Ofrecer la opción de descargar el reporte.
                         st.download_button(
                             label="📥 Descargar Reporte (Markdown)",
@@ -196,13 +301,8 @@ if uploaded_file is not None:
                         )
                     else:
                         # Mostrar el mensaje de error si la generación falla.
-                        st.error(report_content)
+                        st.error(reporter.last_error)
 
     except Exception as e:
         # Captura cualquier error inesperado durante el proceso.
-        st.error(f"Error inesperado: {e}")
-    
-    finally:
-        # Asegura que el archivo temporal se elimine al final, incluso si hay errores.
-        if os.path.exists(temp_filename):
-            os.remove(temp_filename)
\ No newline at end of file
+        st.error(f"Error inesperado: {e}")
\ No newline at end of file
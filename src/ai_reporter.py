@@ -1,60 +1,150 @@
-import google.generativeai as genai
+from functools import lru_cache
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
+import asyncio
+import json
 import os
+import threading
+
+# google.generativeai arrastra grpc y protobuf: se importa solo al crear un reporter,
+# no al cargar la app. lru_cache comparte el módulo entre instancias.
+@lru_cache(maxsize=None)
+def _genai():
+    import google.generativeai as genai
+    return genai
+
+# Cuota agotada o servicio no disponible: errores transitorios que vale la pena reintentar
+def _is_transient(error):
+    from google.api_core import exceptions as api_exceptions
+    return isinstance(error, (api_exceptions.ResourceExhausted, api_exceptions.ServiceUnavailable))
+
+# genai guarda un único cliente gRPC asíncrono por proceso, ligado al loop donde se usó
+# por primera vez: todos los reporters (y sesiones) deben ejecutar en ese mismo loop.
+_loop = None
+_loop_lock = threading.Lock()
+
+def _event_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="genai-event-loop", daemon=True).start()
+    return _loop
+
+# API Key con la que se configuró genai por última vez; reconfigurar descarta
+# los clientes (y sus conexiones) que la librería mantiene a nivel de módulo.
+_configured_api_key = None
+
+# Límite de correlaciones y modas enviadas a Gemini
+MAX_PROMPT_CORRS = 10
+MAX_PROMPT_MODES = 20
+
+PROMPT_TEMPLATE = """Actúa como Data Scientist Senior. Analiza el dataset '{dataset}'.
+
+METADATOS ESTADÍSTICOS (JSON):
+{data}
+
+ESTRUCTURA DEL REPORTE (Markdown):
+Resumen Ejecutivo (Estado de salud de los datos).
+3 Hallazgos Clave (Interpreta correlaciones, outliers y modas de negocio).
+3 Recomendaciones de Limpieza y Preprocesamiento.
+"""
 
 class AIReporter:
     def __init__(self, api_key, model_name):
+        global _configured_api_key
         self.api_key = api_key
         self.model_name = model_name
         self.client = None
+        self.model = None
         
         if self.api_key:
             try:
-                genai.configure(api_key=self.api_key)
+                genai = _genai()
+                if self.api_key != _configured_api_key:
+                    genai.configure(api_key=self.api_key)
+                    _configured_api_key = self.api_key
                 self.model = genai.GenerativeModel(self.model_name)
             except Exception as e:
                 print(f"Error config: {e}")
         else:
             print("⚠️ AVISO: No hay API Key configurada.")
 
-    # Agregamos 'cat_modes' a los argumentos
-    def generate_report(self, dataset_name, shape, missing_percent, outliers, top_corr, cat_modes):
-        if not self.model or not self.api_key:
-            return "Error: Falta API Key o configuración del modelo.", None
+    # Ejecuta una corrutina en el loop compartido del proceso y espera su resultado
+    def run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, _event_loop()).result()
 
-        print(f"🧠 Generando Reporte con {self.model_name}...")
-        
-        prompt = f"""
-        Actúa como Data Scientist Senior. Analiza el dataset '{dataset_name}'.
+    # Reintenta con espera exponencial solo ante cuota agotada o servicio no disponible
+    @retry(
+        wait=wait_exponential(multiplier=1, min=1, max=30),
+        stop=stop_after_attempt(3),
+        retry=retry_if_exception(_is_transient),
+        reraise=True,
+    )
+    async def _generate_content(self, prompt, **kwargs):
+        return await self.model.generate_content_async(prompt, **kwargs)
+
+    def _build_prompt(self, dataset_name, shape, missing_percent, outliers, top_corr, cat_modes):
+        # Metadatos compactos en JSON: menos tokens de entrada = respuesta más rápida y barata
+        payload = {
+            "shape": [int(x) for x in shape],
+            "missing_pct": round(float(missing_percent), 2),
+            "outliers_iqr": int(outliers),
+            "top_corr_pearson": [[pair, round(float(r), 3)] for pair, r in list(top_corr.items())[:MAX_PROMPT_CORRS]],
+            "modes": {str(col): str(val) for col, val in list(cat_modes.items())[:MAX_PROMPT_MODES]},
+        }
+        return PROMPT_TEMPLATE.format(
+            dataset=dataset_name,
+            data=json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+        )
+
+    def _report_path(self, dataset_name):
+        output_folder = "reports"
+        if not os.path.exists(output_folder):
+            os.makedirs(output_folder)
         
-        METADATOS ESTADÍSTICOS:
-        - Dimensiones: {shape}
-        - % Nulos Promedio: {missing_percent:.2f}%
-        - Outliers detectados (IQR): {outliers}
-        - Top Correlaciones (Pearson con signo): {top_corr}
+        clean_name = dataset_name.split(".")[0]
+        filename = f"reporte_{clean_name}.md"
         
-        ESTRUCTURA DEL REPORTE (Markdown):
-        Resumen Ejecutivo (Estado de salud de los datos).
-        3 Hallazgos Clave (Interpreta correlaciones, outliers y modas de negocio).
-        3 Recomendaciones de Limpieza y Preprocesamiento.
-        """
+        return os.path.join(output_folder, filename)
+
+    # Versión completa (sin streaming): consume 'stream_report' y devuelve (texto, ruta) o (error, None)
+    def generate_report(self, dataset_name, shape, missing_percent, outliers, top_corr, cat_modes):
+        report_text = "".join(self.stream_report(dataset_name, shape, missing_percent, outliers, top_corr, cat_modes))
+        if self.last_error:
+            return self.last_error, None
+        return report_text, self.last_report_path
+
+    # Versión en streaming: genera los fragmentos de texto conforme llegan (para st.write_stream).
+    # Al terminar deja la ruta en 'last_report_path'; si falla, el mensaje queda en 'last_error'.
+    def stream_report(self, dataset_name, shape, missing_percent, outliers, top_corr, cat_modes):
+        self.last_report_path = None
+        self.last_error = None
+        if not self.model or not self.api_key:
+            self.last_error = "Error: Falta API Key o configuración del modelo."
+            return
+
+        print(f"🧠 Generando Reporte (streaming) con {self.model_name}...")
+        prompt = self._build_prompt(dataset_name, shape, missing_percent, outliers, top_corr, cat_modes)
+        output_path = self._report_path(dataset_name)
+        partial_path = output_path + ".part"
 
         try:
-            response = self.model.generate_content(prompt)
-            report_text = response.text
-            
-            output_folder = "reports"
-            if not os.path.exists(output_folder):
-                os.makedirs(output_folder)
-            
-            clean_name = dataset_name.split(".")[0]
-            filename = f"reporte_{clean_name}.md"
-            
-            output_path = os.path.join(output_folder, filename)
-            
-            with open(output_path, "w", encoding='utf-8') as f:
-                f.write(report_text)
-            
-            return report_text, output_path
-                
+            response = self.run(self._generate_content(prompt, stream=True))
+            chunks = response.__aiter__()
+            # El archivo se escribe a medida que llegan los fragmentos
+            with open(partial_path, "w", encoding='utf-8') as f:
+                while True:
+                    try:
+                        chunk = self.run(chunks.__anext__())
+                    except StopAsyncIteration:
+                        break
+                    f.write(chunk.text)
+                    yield chunk.text
+            os.replace(partial_path, output_path)
+            self.last_report_path = output_path
+
         except Exception as e:
-            return f"❌ Error API Gemini: {str(e)}", None
\ No newline at end of file
+            self.last_error = f"❌ Error API Gemini: {str(e)}"
+            # No se deja un reporte a medias en disco
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
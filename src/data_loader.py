@@ -4,8 +4,117 @@ Módulo de Carga de Datos.
 Este módulo proporciona la clase DataLoader, responsable de cargar,
 validar y pre-procesar un archivo CSV para el análisis.
 """
+import contextlib
+import csv
+import hashlib
+import json
+import re
+from pathlib import Path
 import pandas as pd
 import numpy as np
+from src.statistics import build_numeric_array
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pac
+except ImportError:
+    pa = pac = None
+
+# Dimensiones mínimas que debe tener un dataset para ser analizado.
+MIN_ROWS = 2000
+MIN_COLS = 10
+
+# Fragmentos de nombre que sugieren que una columna es un identificador.
+_ID_NAME_RE = re.compile(r"id|code|codigo|index", re.IGNORECASE)
+
+# Marcadores de nulo que `pd.read_csv` reconoce por defecto; PyArrow usa los mismos.
+_NA_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None",
+    "n/a", "nan", "null",
+]
+
+# Caché en disco de datasets ya parseados, indexada por el hash del contenido.
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "auto_data_analyst"
+# Se incrementa cuando cambia lo que se guarda, para invalidar entradas viejas.
+_CACHE_VERSION = 1
+# Tamaño máximo de la caché; al superarlo se borran las entradas menos usadas.
+CACHE_MAX_BYTES = 1 << 30
+
+# Fracción de filas que puede alcanzar la cardinalidad de una columna categórica
+# para codificarla como `category` (nunca menos de 50 valores).
+CATEGORY_RATIO = 0.01
+
+# Cardinalidad máxima de una columna categórica para precalcular su conteo de valores.
+MAX_COUNTED_CATEGORIES = 50
+
+# Filas usadas para sondear la cardinalidad de las columnas candidatas a ID.
+ID_SAMPLE_CAP = 1_000_000
+
+
+def _dedupe_columns(names):
+    """
+    Renombra los encabezados repetidos como lo hace `pd.read_csv` ('c', 'c.1', 'c.2', ...).
+
+    Args:
+        names (list): Nombres de columna tal como aparecen en el archivo.
+
+    Returns:
+        list: Nombres únicos, en el mismo orden.
+    """
+    used = set()
+    counts = {}
+    result = []
+    for name in names:
+        new_name = name
+        while new_name in used:
+            counts[name] = counts.get(name, 0) + 1
+            new_name = f"{name}.{counts[name]}"
+        used.add(new_name)
+        result.append(new_name)
+    return result
+
+
+def _approx_nunique(series, precision=14, chunk_size=1 << 20):
+    """
+    Estima el número de valores únicos (sin nulos) con un sketch HyperLogLog.
+
+    Recorre la serie por bloques, de modo que la memoria usada es la de los
+    2**precision registros y no crece con el número de filas. Con la precisión
+    por defecto el error típico ronda el 0.8%.
+
+    Args:
+        series (pd.Series): La columna a evaluar.
+        precision (int): Bits del hash usados para elegir el registro.
+        chunk_size (int): Filas procesadas por bloque.
+
+    Returns:
+        float: La cardinalidad estimada.
+    """
+    m = 1 << precision
+    width = 64 - precision
+    registers = np.zeros(m, dtype=np.uint8)
+
+    for start in range(0, len(series), chunk_size):
+        chunk = series.iloc[start:start + chunk_size].dropna()
+        if chunk.empty:
+            continue
+        hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+        idx = (hashes >> np.uint64(width)).astype(np.intp)
+        rest = hashes & np.uint64((1 << width) - 1)
+        # Rango = posición del primer bit en 1 dentro de los bits restantes.
+        rank = np.full(rest.shape, width + 1, dtype=np.uint8)
+        nonzero = rest > 0
+        rank[nonzero] = width - np.floor(np.log2(rest[nonzero].astype(np.float64))).astype(np.uint8)
+        np.maximum.at(registers, idx, rank)
+
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(np.exp2(-registers.astype(np.float64)))
+    zeros = np.count_nonzero(registers == 0)
+    if estimate <= 2.5 * m and zeros:
+        # Corrección para cardinalidades pequeñas (linear counting).
+        estimate = m * np.log(m / zeros)
+    return float(estimate)
 
 class DataLoader:
     """
@@ -16,48 +125,413 @@ class DataLoader:
     filtrando aquellas que parecen ser identificadores únicos.
 
     Attributes:
-        file_path (str): La ruta al archivo CSV a cargar.
+        file_path (str or file-like): La ruta al archivo CSV a cargar, o un objeto
+            binario tipo archivo (p. ej. `io.BytesIO`) con su contenido.
         df (pd.DataFrame): El DataFrame de pandas cargado. None si no se ha cargado.
         numerical_cols (list): Lista de nombres de columnas numéricas válidas.
         categorical_cols (list): Lista de nombres de columnas categóricas.
+        cat_cardinality (dict): Número de valores únicos (sin nulos) de cada
+            columna categórica, calculado una sola vez al cargar.
+        cat_value_counts (dict): `value_counts()` de las columnas categóricas con
+            entre 1 y 50 valores únicos, compartido por las modas y las gráficas.
+        num_array (np.ndarray): Matriz contigua float64 (filas x columnas) con las
+            columnas de `numerical_cols`, construida una sola vez al cargar.
+        num_index (dict): Posición de cada columna numérica dentro de `num_array`.
+        cache_dir (Path or None): Carpeta de la caché en disco. None la desactiva.
+        engine (str): Lector de CSV a usar: "pyarrow" (por defecto) o "polars".
+        id_sample_cap (int): Máximo de filas sobre las que se cuenta exactamente
+            la cardinalidad de las columnas candidatas a ID.
+        dtype_downcast (bool): Si las columnas numéricas se reducen al tipo más
+            pequeño que conserva sus valores (float32, int32, ...).
+        schema (dict or None): Tipos declarados por columna; las columnas
+            incluidas no pasan por la inferencia de tipos.
+        category_ratio (float): Cardinalidad máxima, relativa al número de filas,
+            de las columnas categóricas que se codifican como `category`.
     """
-    def __init__(self, file_path):
+    def __init__(self, file_path, cache_dir=DEFAULT_CACHE_DIR, engine="pyarrow",
+                 id_sample_cap=ID_SAMPLE_CAP, dtype_downcast=False, schema=None,
+                 category_ratio=CATEGORY_RATIO):
         """
         Inicializa el DataLoader con la ruta al archivo.
 
         Args:
-            file_path (str): La ruta al archivo CSV.
+            file_path (str or file-like): La ruta al archivo CSV o un buffer binario
+                con su contenido.
+            cache_dir (Path or None, optional): Carpeta donde se guardan los datasets
+                ya procesados (Feather + JSON). None desactiva la caché.
+            engine (str, optional): "pyarrow" usa el lector multihilo de PyArrow;
+                "polars" usa `polars.scan_csv` y calcula la cardinalidad de las
+                columnas candidatas a ID en el mismo plan perezoso. Si Polars no
+                está instalado se usa el lector por defecto.
+            id_sample_cap (int, optional): Filas iniciales usadas para contar
+                valores únicos al detectar IDs. Solo las columnas que parecen
+                únicas en esa muestra se verifican sobre el archivo completo.
+            dtype_downcast (bool, optional): Reduce las columnas numéricas válidas
+                a float32 / enteros más pequeños tras cargarlas, a costa de
+                precisión en los decimales. Desactivado por defecto.
+            schema (dict, optional): Mapea nombres de columna a tipos, como alias
+                de texto ("float64", "int32", "string", "bool", ...) o tipos de
+                PyArrow. Se aplica en todos los lectores; sin PyArrow instalado,
+                solo valen los nombres de tipo que entiende pandas.
+            category_ratio (float, optional): Una columna categórica se codifica
+                como `category` si tiene como mucho `max(50, filas * category_ratio)`
+                valores únicos. Las de texto libre o casi únicas quedan fuera.
         """
+        if engine not in ("pyarrow", "polars"):
+            raise ValueError(f"Motor de lectura no soportado: {engine!r}")
         self.file_path = file_path
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.engine = engine
+        self.id_sample_cap = id_sample_cap
+        self.dtype_downcast = dtype_downcast
+        self.schema = schema
+        self.category_ratio = category_ratio
+        self._content_hash = None
+        # Encabezado y fin de línea detectados por `_cheap_shape` (los usa el motor Polars).
+        self._header = None
+        self._eol_char = "\n"
+        # Cardinalidades de las candidatas a ID ya calculadas por el lector (motor Polars).
+        self._id_unique_counts = None
         self.df = None
         self.numerical_cols = []
         self.categorical_cols = []
+        self.cat_cardinality = {}
+        self.cat_value_counts = {}
+        self.num_array = None
+        self.num_index = {}
 
     def load_and_validate(self):
         """
         Carga el archivo CSV, valida sus dimensiones y filtra las columnas.
 
-        Intenta leer el archivo CSV especificado en `file_path`. Luego, valida
-        que el DataFrame resultante tenga al menos 2000 filas y 10 columnas.
+        Primero estima las dimensiones del archivo sin parsearlo y lo descarta
+        si no alcanza el mínimo. Si el mismo contenido ya se procesó antes, lo
+        recupera de la caché en disco. Si no, lee el CSV especificado en `file_path` y
+        valida que el DataFrame resultante tenga al menos 2000 filas y 10 columnas.
         Si la validación es exitosa, procede a clasificar y filtrar las columnas.
 
         Returns:
             bool: True si la carga y validación son exitosas, False en caso contrario.
         """
         try:
-            self.df = pd.read_csv(self.file_path)
+            # Pre-chequeo barato: evita parsear archivos que no cumplen el mínimo.
+            # Si no se puede estimar, la validación queda a cargo del parseo completo.
+            shape = self._cheap_shape()
+            if shape is not None and (shape[0] < MIN_ROWS or shape[1] < MIN_COLS):
+                print(f"Dataset descartado sin parsear: ~{shape[0]} filas, {shape[1]} columnas.")
+                return False
+
+            if self._load_cache():
+                print(f"Dataset cargado desde caché: {self.df.shape}")
+                self._count_categories()
+                self._build_num_array()
+                return True
+
+            self.df = self._read_csv()
             print(f"Dataset cargado: {self.df.shape}")
             
-            if self.df.shape[0] < 2000 or self.df.shape[1] < 10:
+            if self.df.shape[0] < MIN_ROWS or self.df.shape[1] < MIN_COLS:
                 return False
 
             self._filter_columns()
+            self._save_cache()
+            self._count_categories()
+            self._build_num_array()
             
             return True
         except Exception as e:
             print(f"❌ Error al cargar datos: {e}")
             return False
 
+    def _open_source(self):
+        """
+        Devuelve la fuente lista para leerse desde el inicio.
+
+        Las rutas se devuelven tal cual; los buffers se rebobinan, ya que el
+        pre-chequeo y el parseo los leen más de una vez.
+        """
+        if hasattr(self.file_path, "read"):
+            self.file_path.seek(0)
+        return self.file_path
+
+    def _open_binary(self):
+        """
+        Abre la fuente en modo binario como context manager.
+
+        Un buffer no se cierra al salir, porque luego se vuelve a leer.
+        """
+        source = self._open_source()
+        if hasattr(source, "read"):
+            return contextlib.nullcontext(source)
+        return open(source, "rb")
+
+    def _cheap_shape(self):
+        """
+        Estima las dimensiones del CSV sin construir el DataFrame.
+
+        Cuenta los saltos de línea leyendo el archivo en bloques de 1 MiB y
+        obtiene el número de columnas parseando solo el encabezado. Acepta
+        finales de línea LF, CRLF o solo CR. El conteo de filas es una cota
+        superior (las líneas vacías o los campos con saltos de línea entre
+        comillas suman de más), por lo que solo sirve para descartar archivos
+        que seguro no cumplen el mínimo.
+
+        Returns:
+            tuple or None: (filas estimadas sin contar el encabezado, número de
+                columnas), o None si el encabezado no se pudo interpretar.
+        """
+        n_lf = n_cr = 0
+        digest = hashlib.blake2b(digest_size=16)
+        head = b""
+        header_done = False
+        last = b""
+        with self._open_binary() as f:
+            while True:
+                chunk = f.read(1 << 20)
+                if not chunk:
+                    break
+                if not header_done:
+                    head += chunk
+                    header_done = b"\n" in chunk or b"\r" in chunk
+                digest.update(chunk)
+                n_lf += chunk.count(b"\n")
+                n_cr += chunk.count(b"\r")
+                last = chunk[-1:]
+
+        # El mismo recorrido deja listo el hash del contenido para la caché en disco.
+        self._content_hash = digest.hexdigest()
+
+        # Sin LF el archivo usa CR como separador de líneas.
+        n_lines = n_lf if n_lf else n_cr
+        self._eol_char = "\n" if n_lf or not n_cr else "\r"
+        # La última línea puede no terminar en salto de línea.
+        if last and last not in (b"\n", b"\r"):
+            n_lines += 1
+
+        header = re.split(rb"\r|\n", head, maxsplit=1)[0]
+        try:
+            first_row = next(csv.reader([header.decode("utf-8-sig", errors="replace")]), [])
+        except csv.Error:
+            return None
+        self._header = first_row
+        return max(n_lines - 1, 0), len(first_row)
+
+    def _cache_paths(self):
+        """Rutas (Feather, JSON) de la entrada de caché del archivo actual, o None."""
+        if self.cache_dir is None or self._content_hash is None or pac is None:
+            return None
+        stem = f"{self._content_hash}-v{_CACHE_VERSION}"
+        # Las opciones que cambian los datos guardados dan a cada combinación su entrada.
+        options = {}
+        if self.engine != "pyarrow":
+            # Cada lector puede inferir tipos distintos para el mismo archivo.
+            options["engine"] = self.engine
+        if self.dtype_downcast:
+            options["dtype_downcast"] = True
+        if self.schema:
+            options["schema"] = self.schema
+        if self.category_ratio != CATEGORY_RATIO:
+            options["category_ratio"] = self.category_ratio
+        if options:
+            digest = hashlib.blake2b(json.dumps(options, sort_keys=True, default=str).encode("utf-8"), digest_size=4)
+            stem += "-" + digest.hexdigest()
+        return self.cache_dir / f"{stem}.feather", self.cache_dir / f"{stem}.json"
+
+    def _load_cache(self):
+        """
+        Recupera el DataFrame y la clasificación de columnas desde la caché en disco.
+
+        Returns:
+            bool: True si había una entrada válida para este contenido.
+        """
+        paths = self._cache_paths()
+        if paths is None or not paths[0].exists() or not paths[1].exists():
+            return False
+        try:
+            meta = json.loads(paths[1].read_text(encoding="utf-8"))
+            self.df = pd.read_feather(paths[0])
+        except Exception as e:
+            print(f"⚠️ Caché ilegible, se vuelve a parsear: {e}")
+            return False
+        # La fecha de modificación marca el último uso, para `_evict_cache`.
+        with contextlib.suppress(OSError):
+            paths[0].touch()
+        self.numerical_cols = meta["numerical_cols"]
+        self.categorical_cols = meta["categorical_cols"]
+        self.cat_cardinality = meta["cat_cardinality"]
+        return True
+
+    def _save_cache(self):
+        """
+        Guarda el DataFrame (Feather comprimido con zstd) y la clasificación de
+        columnas (JSON) y después recorta la caché a `CACHE_MAX_BYTES`. Un
+        fallo al escribir no afecta la carga.
+        """
+        paths = self._cache_paths()
+        if paths is None:
+            return
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self.df.reset_index(drop=True).to_feather(paths[0], compression="zstd")
+            meta = {
+                "numerical_cols": self.numerical_cols,
+                "categorical_cols": self.categorical_cols,
+                "cat_cardinality": self.cat_cardinality,
+            }
+            paths[1].write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+            self._evict_cache(keep=paths[0])
+        except Exception as e:
+            print(f"⚠️ No se pudo escribir la caché: {e}")
+
+    def _evict_cache(self, keep):
+        """
+        Borra las entradas usadas hace más tiempo hasta que la caché quepa en
+        `CACHE_MAX_BYTES`. La entrada `keep` (la recién escrita) nunca se borra.
+
+        Args:
+            keep (Path): Archivo Feather de la entrada que debe conservarse.
+        """
+        entries = []
+        for feather in self.cache_dir.glob("*.feather"):
+            meta = feather.with_suffix(".json")
+            try:
+                stat = feather.stat()
+                size = stat.st_size + (meta.stat().st_size if meta.exists() else 0)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, size, feather, meta))
+        entries.sort(key=lambda entry: entry[0], reverse=True)
+        total = 0
+        for _, size, feather, meta in entries:
+            total += size
+            if total > CACHE_MAX_BYTES and feather != keep:
+                with contextlib.suppress(OSError):
+                    feather.unlink()
+                    meta.unlink()
+                total -= size
+
+    def _read_csv(self):
+        """
+        Lee el archivo CSV usando el lector multihilo de PyArrow si está disponible.
+
+        Las columnas se mantienen con tipos Arrow (`pd.ArrowDtype`), evitando una
+        segunda inferencia de tipos. Los nulos y los encabezados duplicados se
+        tratan igual que en `pd.read_csv`. Las columnas declaradas en `schema` se
+        leen con ese tipo sin inferirlo. Si PyArrow no está instalado o no puede
+        parsear el archivo (p. ej. filas con menos campos), recurre a `pd.read_csv`.
+
+        Returns:
+            pd.DataFrame: El DataFrame leído.
+        """
+        if self.engine == "polars":
+            df = self._read_csv_polars()
+            if df is not None:
+                return df
+
+        if pac is None:
+            return self._read_csv_pandas()
+
+        try:
+            table = pac.read_csv(
+                self._open_source(),
+                read_options=pac.ReadOptions(use_threads=True, block_size=8 << 20),
+                convert_options=pac.ConvertOptions(
+                    column_types=self._arrow_schema(),
+                    null_values=_NA_VALUES,
+                    strings_can_be_null=True,
+                )
+            )
+        except pa.ArrowInvalid as e:
+            print(f"PyArrow no pudo leer el archivo ({e}); usando pandas.")
+            return self._read_csv_pandas()
+
+        table = table.rename_columns(_dedupe_columns(table.column_names))
+        return table.to_pandas(types_mapper=pd.ArrowDtype, self_destruct=True)
+
+    def _arrow_schema(self):
+        """Traduce `schema` a tipos de PyArrow. Requiere PyArrow instalado."""
+        if not self.schema:
+            return None
+        return {
+            col: pa.type_for_alias(dtype) if isinstance(dtype, str) else dtype
+            for col, dtype in self.schema.items()
+        }
+
+    def _read_csv_pandas(self):
+        """
+        Lee el archivo con `pd.read_csv`, aplicando `schema` si se declaró.
+
+        Con PyArrow instalado, cada tipo se traduce igual que en el lector de
+        PyArrow (`pd.ArrowDtype`), de modo que los alias de Arrow ("utf8",
+        "timestamp[s]", ...) también funcionan aquí. Sin PyArrow, los alias se
+        pasan tal cual y deben ser nombres que pandas entienda.
+        """
+        dtype = None
+        if self.schema:
+            if pa is not None:
+                dtype = {col: pd.ArrowDtype(t) for col, t in self._arrow_schema().items()}
+            else:
+                dtype = dict(self.schema)
+        return pd.read_csv(self._open_source(), dtype=dtype)
+
+    def _read_csv_polars(self):
+        """
+        Lee el archivo CSV con `polars.scan_csv` (lector multihilo y perezoso).
+
+        Los encabezados duplicados se renombran como en `pd.read_csv` y los
+        archivos con fin de línea CR se leen con ese separador. El esquema se
+        obtiene sin leer datos. El archivo se recorre una sola vez: las
+        cardinalidades de las columnas numéricas cuyo nombre sugiere ID se
+        calculan sobre el DataFrame ya leído y se guardan para
+        `_filter_columns`. El resultado se convierte a pandas con tipos Arrow,
+        igual que el lector de PyArrow.
+
+        Returns:
+            pd.DataFrame or None: El DataFrame leído, o None si Polars no está
+                disponible o no pudo parsear el archivo.
+        """
+        try:
+            import polars as pl
+        except ImportError:
+            print("Polars no está instalado; usando el lector por defecto.")
+            return None
+
+        try:
+            lf = pl.scan_csv(
+                self._open_source(),
+                eol_char=self._eol_char,
+                new_columns=_dedupe_columns(self._header) if self._header else None,
+                schema_overrides=self._polars_schema(pl),
+                null_values=_NA_VALUES,
+                infer_schema_length=10_000,
+            )
+            schema = lf.collect_schema()
+            candidates = [
+                col for col, dtype in schema.items()
+                if dtype.is_numeric() and _ID_NAME_RE.search(col)
+            ]
+            pl_df = lf.collect()
+            unique_counts = {}
+            if candidates:
+                # Como `nunique` de pandas, los nulos no cuentan como valor.
+                unique_counts = pl_df.select(
+                    [pl.col(col).drop_nulls().n_unique() for col in candidates]
+                ).row(0, named=True)
+            df = pl_df.to_pandas(use_pyarrow_extension_array=True)
+        except pl.exceptions.PolarsError as e:
+            print(f"Polars no pudo leer el archivo ({e}); usando el lector por defecto.")
+            return None
+
+        self._id_unique_counts = unique_counts
+        return df
+
+    def _polars_schema(self, pl):
+        """Traduce `schema` a tipos de Polars (pasando por los tipos de PyArrow)."""
+        schema = self._arrow_schema()
+        if schema is None:
+            return None
+        return {col: pl.from_arrow(pa.array([], type=dtype)).dtype for col, dtype in schema.items()}
+
     def _filter_columns(self):
         """
         Clasifica las columnas en numéricas y categóricas, y filtra las de tipo ID.
@@ -66,27 +540,106 @@ class DataLoader:
         en sus tipos de datos. Además, implementa una heurística para detectar y
         excluir columnas numéricas que probablemente son identificadores (ej. 'id', 'codigo')
         basándose en su nombre y en tener una alta cardinalidad (muchos valores únicos).
+        Finalmente, codifica como `category` las columnas categóricas de baja cardinalidad.
         """
         all_num = self.df.select_dtypes(include=[np.number]).columns.tolist()
         self.categorical_cols = self.df.select_dtypes(exclude=[np.number]).columns.tolist()
         self.numerical_cols = []
 
         print("🔍 Analizando tipos de columnas...")
+        total_rows = len(self.df)
+
+        # Heurística: solo las columnas cuyo nombre sugiere ID necesitan contar
+        # valores únicos; el resto se acepta sin recorrer sus datos.
+        candidates = [col for col in all_num if _ID_NAME_RE.search(str(col))]
+        if self._id_unique_counts is not None:
+            # El lector de Polars ya las calculó al parsear.
+            unique_counts = self._id_unique_counts
+        else:
+            # Sondeo acotado: conteo exacto sobre las primeras `id_sample_cap` filas.
+            sample = self.df.head(self.id_sample_cap)
+            unique_counts = sample[candidates].nunique().to_dict() if candidates else {}
+            if total_rows > len(sample):
+                unseen_rows = total_rows - len(sample)
+                for col in candidates:
+                    # Cota superior: los únicos de la muestra más un valor nuevo por cada
+                    # fila no vista. Si ni así llega al 90%, la columna no es un ID.
+                    # Si no, se mide sobre toda la columna; como solo importa el
+                    # umbral, basta una estimación (HyperLogLog).
+                    if unique_counts[col] + unseen_rows > total_rows * 0.9:
+                        unique_counts[col] = _approx_nunique(self.df[col])
+
         for col in all_num:
-            unique_count = self.df[col].nunique()
-            total_rows = len(self.df)
-            
-            # Heurística: si el nombre sugiere ID y tiene una cardinalidad muy alta.
-            is_id_name = any(x in col.lower() for x in ['id', 'code', 'codigo', 'index'])
-            if is_id_name and unique_count > total_rows * 0.9:
+            if col in unique_counts and unique_counts[col] > total_rows * 0.9:
                 print(f"Ignorando '{col}': Nombre sugiere ID.")
                 continue
-                
+
             self.numerical_cols.append(col)
 
+        self._encode_categories()
+        if self.dtype_downcast:
+            self._downcast_numeric()
+
         print(f"   Variables Numéricas Válidas: {len(self.numerical_cols)}")
         print(f"   Variables Categóricas Detectadas: {len(self.categorical_cols)}")
 
+    def _encode_categories(self):
+        """
+        Convierte las columnas categóricas de baja cardinalidad al tipo `category`.
+
+        Los valores repetidos se guardan una sola vez y las operaciones
+        posteriores (modas, conteos, gráficas) trabajan sobre códigos enteros.
+        Las cardinalidades calculadas se guardan en `cat_cardinality` para que
+        no haya que volver a recorrer las columnas.
+        """
+        if not self.categorical_cols:
+            self.cat_cardinality = {}
+            return
+
+        max_categories = max(50, int(len(self.df) * self.category_ratio))
+        unique_counts = self.df[self.categorical_cols].nunique(dropna=True)
+        self.cat_cardinality = {col: int(unique_counts[col]) for col in self.categorical_cols}
+        for col in self.categorical_cols:
+            # Las columnas sin ningún valor (p. ej. tipo `null` de Arrow) no se codifican.
+            if 0 < unique_counts[col] <= max_categories:
+                self.df[col] = self.df[col].astype("category")
+
+    def _downcast_numeric(self):
+        """
+        Reduce cada columna numérica válida al tipo más pequeño que admite sus valores.
+
+        Los flotantes pasan a float32 y los enteros al menor entero con signo
+        posible. `pd.to_numeric` conserva el tipo original cuando algún valor
+        no cabe en el rango del tipo reducido.
+        """
+        for col in self.numerical_cols:
+            kind = "float" if pd.api.types.is_float_dtype(self.df[col].dtype) else "integer"
+            self.df[col] = pd.to_numeric(self.df[col], downcast=kind)
+
+    def _count_categories(self):
+        """
+        Calcula una sola vez el conteo de valores de las columnas categóricas.
+
+        Solo se incluyen las columnas con entre 1 y `MAX_COUNTED_CATEGORIES`
+        valores únicos (según `cat_cardinality`), que son las únicas para las
+        que se calcula la moda o se dibuja un gráfico de frecuencias.
+        """
+        self.cat_value_counts = {
+            col: self.df[col].value_counts(dropna=True)
+            for col in self.categorical_cols
+            if 0 < self.cat_cardinality.get(col, 0) <= MAX_COUNTED_CATEGORIES
+        }
+
+    def _build_num_array(self):
+        """
+        Materializa las columnas numéricas válidas en una sola matriz contigua.
+
+        Las estadísticas y las gráficas leen de esta matriz en lugar de volver a
+        seleccionar (y copiar) las columnas del DataFrame en cada cálculo.
+        """
+        self.num_array = build_numeric_array(self.df, self.numerical_cols)
+        self.num_index = {col: i for i, col in enumerate(self.numerical_cols)}
+
     def get_data(self):
         """
         Retorna los datos procesados.
@@ -96,5 +649,12 @@ class DataLoader:
                 - pd.DataFrame: El DataFrame cargado.
                 - list: La lista de columnas numéricas.
                 - list: La lista de columnas categóricas.
+                - dict: La cardinalidad de cada columna categórica.
+                - dict: El conteo de valores de las columnas categóricas de baja
+                  cardinalidad.
+                - np.ndarray: La matriz float64 de las columnas numéricas.
         """
-        return self.df, self.numerical_cols, self.categorical_cols
\ No newline at end of file
+        return (
+            self.df, self.numerical_cols, self.categorical_cols,
+            self.cat_cardinality, self.cat_value_counts, self.num_array,
+        )
\ No newline at end of file
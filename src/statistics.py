@@ -4,7 +4,87 @@ Módulo de Análisis Estadístico.
 Este módulo proporciona la clase StatsAnalyzer, que se encarga de realizar
 cálculos estadísticos clave sobre un DataFrame de pandas.
 """
+import warnings
 import numpy as np
+import pandas as pd
+
+
+def _pearson_matrix(arr):
+    """
+    Calcula la matriz de correlación de Pearson con eliminación de nulos por pares.
+
+    Las columnas sin nulos se correlacionan entre sí con una sola llamada a
+    `np.corrcoef` (BLAS). Solo los pares que involucran columnas con nulos usan
+    las filas donde ambos valores existen, igual que `DataFrame.corr`.
+
+    Args:
+        arr (np.ndarray): Matriz (filas x columnas) con NaN como nulo.
+
+    Returns:
+        np.ndarray: Matriz de correlación de forma (columnas, columnas).
+    """
+    n_cols = arr.shape[1]
+    has_nan = np.isnan(arr).any(axis=0)
+    clean = np.flatnonzero(~has_nan)
+    dirty = np.flatnonzero(has_nan)
+    corr = np.full((n_cols, n_cols), np.nan)
+
+    with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        if clean.size:
+            corr[np.ix_(clean, clean)] = np.atleast_2d(np.corrcoef(arr[:, clean], rowvar=False))
+
+        # Columna con nulos vs. columnas completas: basta filtrar las filas válidas de la primera.
+        for j in dirty:
+            rows = ~np.isnan(arr[:, j])
+            idx = np.concatenate(([j], clean))
+            sub = np.atleast_2d(np.corrcoef(arr[rows][:, idx], rowvar=False))
+            corr[j, idx] = sub[0]
+            corr[idx, j] = sub[0]
+
+    # Pares entre columnas con nulos: cálculo por pares de pandas.
+    if dirty.size:
+        corr[np.ix_(dirty, dirty)] = pd.DataFrame(arr[:, dirty]).corr(method='pearson').to_numpy()
+    return corr
+
+
+def mode_from_counts(value_counts):
+    """
+    Obtiene la moda a partir de un `value_counts()` ya calculado.
+
+    Ante un empate devuelve el menor de los valores más frecuentes, igual que
+    `Series.mode()[0]`.
+
+    Args:
+        value_counts (pd.Series): Conteos por valor, en cualquier orden.
+
+    Returns:
+        El valor más frecuente.
+    """
+    counts = value_counts.to_numpy()
+    top = value_counts.index[counts == counts.max()]
+    return top.sort_values()[0]
+
+
+def build_numeric_array(df, numerical_cols):
+    """
+    Materializa las columnas numéricas en una sola matriz contigua float64.
+
+    Se construye una vez y se comparte entre los cálculos estadísticos y las
+    visualizaciones, en lugar de re-seleccionar columnas del DataFrame en cada
+    paso. Los nulos se representan como NaN. Se usa float64 y no float32: con
+    float32, valores del orden de 1e9 (p. ej. marcas de tiempo) se redondean a
+    múltiplos de 64 y las estadísticas cambian.
+
+    Args:
+        df (pd.DataFrame): El DataFrame de origen.
+        numerical_cols (list): Columnas numéricas a incluir, en orden.
+
+    Returns:
+        np.ndarray: Matriz de forma (filas, len(numerical_cols)).
+    """
+    return np.ascontiguousarray(df[numerical_cols].to_numpy(dtype=np.float64, na_value=np.nan))
+
 
 class StatsAnalyzer:
     """
@@ -19,8 +99,14 @@ class StatsAnalyzer:
         df (pd.DataFrame): El DataFrame a analizar.
         numerical_cols (list): Lista de nombres de columnas numéricas.
         categorical_cols (list): Lista de nombres de columnas categóricas.
+        num_array (np.ndarray): Matriz contigua float64 con las columnas numéricas,
+            compartida por los cálculos numéricos.
+        value_counts (dict): Conteos de valores precalculados por columna categórica.
+        varying (np.ndarray): Máscara booleana de las columnas numéricas con al menos
+            dos valores distintos; las constantes o vacías no aportan correlaciones
+            ni outliers.
     """
-    def __init__(self, df, numerical_cols, categorical_cols):
+    def __init__(self, df, numerical_cols, categorical_cols, num_array=None, value_counts=None):
         """
         Inicializa el StatsAnalyzer.
 
@@ -28,10 +114,32 @@ class StatsAnalyzer:
             df (pd.DataFrame): El DataFrame de pandas a analizar.
             numerical_cols (list): Lista de nombres de las columnas numéricas.
             categorical_cols (list): Lista de nombres de las columnas categóricas.
+            num_array (np.ndarray, optional): Matriz precalculada de las columnas
+                numéricas (filas x columnas). Si se omite o no es float64, se construye
+                a partir de `df`.
+            value_counts (dict, optional): `value_counts()` ya calculados por columna
+                categórica (p. ej. `DataLoader.cat_value_counts`). Las columnas
+                incluidas no se vuelven a recorrer al calcular su moda.
         """
         self.df = df
         self.numerical_cols = numerical_cols
         self.categorical_cols = categorical_cols
+        # La máscara de columnas constantes y los cálculos necesitan float64: una matriz
+        # de menor precisión (p. ej. float32) puede volver constantes columnas que no lo son.
+        if num_array is None or num_array.dtype != np.float64:
+            num_array = build_numeric_array(df, numerical_cols)
+        self.num_array = num_array
+        self.value_counts = value_counts or {}
+        self.varying = np.zeros(num_array.shape[1], dtype=bool)
+        if len(num_array):
+            with warnings.catch_warnings():
+                # Las columnas completamente nulas dan NaN y quedan fuera de la máscara.
+                warnings.simplefilter('ignore', RuntimeWarning)
+                self.varying = np.nanmax(num_array, axis=0) > np.nanmin(num_array, axis=0)
+
+    def _varying_block(self):
+        """Columnas de `num_array` que no son constantes, sin copiar si lo son todas."""
+        return self.num_array if self.varying.all() else self.num_array[:, self.varying]
 
     def get_missing_percentage(self):
         """
@@ -42,7 +150,12 @@ class StatsAnalyzer:
                        que tienen al menos un valor faltante, ordenado de
                        mayor a menor.
         """
-        missing = self.df.isnull().mean() * 100
+        # Las columnas numéricas se leen de la matriz compartida; solo el resto pasa por
+        # pandas, sin construir una máscara booleana del tamaño de todo el DataFrame.
+        num_missing = pd.Series(np.isnan(self.num_array).mean(axis=0) * 100, index=self.numerical_cols)
+        other_cols = self.df.columns.difference(self.numerical_cols, sort=False)
+        other_missing = self.df[other_cols].isnull().mean() * 100
+        missing = pd.concat([num_missing, other_missing]).reindex(self.df.columns)
         return missing[missing > 0].sort_values(ascending=False)
 
     def get_categorical_modes(self):
@@ -58,9 +171,22 @@ class StatsAnalyzer:
         """
         modes = {}
         for col in self.categorical_cols:
-            # Heurística para ignorar columnas que parecen texto libre o IDs.
-            if self.df[col].nunique() > 50: continue
-            modes[col] = self.df[col].mode()[0]
+            if col in self.value_counts:
+                # Conteo precalculado: solo incluye columnas con hasta 50 valores únicos.
+                modes[col] = mode_from_counts(self.value_counts[col])
+                continue
+            series = self.df[col]
+            # Heurística para ignorar columnas que parecen texto libre o IDs. En
+            # columnas sin codificar, `nunique` descarta las de alta cardinalidad
+            # sin construir su tabla de conteos.
+            if not isinstance(series.dtype, pd.CategoricalDtype) and series.nunique() > 50: continue
+            # Un solo conteo da la cardinalidad y la moda (sin ordenar: solo hace
+            # falta el máximo). Las categorías sin observaciones cuentan 0.
+            counts = series.value_counts(dropna=True, sort=False)
+            n_unique = np.count_nonzero(counts.to_numpy())
+            # Las columnas sin ningún valor no tienen moda.
+            if n_unique == 0 or n_unique > 50: continue
+            modes[col] = mode_from_counts(counts)
         return modes
 
     def calculate_correlations(self):
@@ -79,18 +205,31 @@ class StatsAnalyzer:
         if len(self.numerical_cols) < 2:
             return {}, None
 
-        # Calcula la matriz de correlación de Pearson.
-        corr_matrix = self.df[self.numerical_cols].corr(method='pearson')
-        
-        # Crea una máscara para eliminar la diagonal superior y duplicados.
-        mask = np.triu(np.ones(corr_matrix.shape), k=1).astype(bool)
-        corrs = corr_matrix.where(mask).stack()
-        
-        # Ordena por magnitud absoluta para encontrar las más fuertes, pero conserva el signo.
-        top_corr = corrs.iloc[np.argsort(-corrs.abs())].head(5)
-        
+        cols = self.numerical_cols
+        arr = self.num_array
+
+        # Calcula la matriz de correlación de Pearson. Las columnas constantes tienen
+        # desviación 0 y su correlación es NaN: solo se calcula entre las demás.
+        if self.varying.all():
+            corr_values = _pearson_matrix(arr)
+        else:
+            corr_values = np.full((len(cols), len(cols)), np.nan)
+            corr_values[np.ix_(self.varying, self.varying)] = _pearson_matrix(self._varying_block())
+        corr_matrix = pd.DataFrame(corr_values, index=cols, columns=cols)
+
+        # Toma solo el triángulo superior (sin diagonal ni duplicados).
+        iu, ju = np.triu_indices(len(cols), k=1)
+        vals = corr_values[iu, ju]
+        valid = np.flatnonzero(~np.isnan(vals))
+
+        # Selecciona las 5 más fuertes por magnitud absoluta sin ordenar todo el
+        # triángulo, pero conserva el signo.
+        k = min(5, valid.size)
+        top = valid[np.argpartition(-np.abs(vals[valid]), k - 1)[:k]] if k else valid
+        top = top[np.argsort(-np.abs(vals[top]))]
+
         # Formatea el resultado en un diccionario para el reporte de IA.
-        top_dict = {f"{i[0]} vs {i[1]}": round(v, 4) for i, v in top_corr.items()}
+        top_dict = {f"{cols[iu[i]]} vs {cols[ju[i]]}": round(float(vals[i]), 4) for i in top}
         return top_dict, corr_matrix
 
     def count_outliers_iqr(self):
@@ -103,11 +242,17 @@ class StatsAnalyzer:
         Returns:
             int: El número total de outliers detectados en todo el dataset numérico.
         """
-        total_outliers = 0
-        for col in self.numerical_cols:
-            Q1 = self.df[col].quantile(0.25)
-            Q3 = self.df[col].quantile(0.75)
-            IQR = Q3 - Q1
-            currentOutliers = ((self.df[col] < (Q1 - 1.5 * IQR)) | (self.df[col] > (Q3 + 1.5 * IQR))).sum()
-            total_outliers += currentOutliers
-        return total_outliers
\ No newline at end of file
+        # En una columna constante IQR = 0 y ningún valor cae fuera: se omiten.
+        X = self._varying_block()
+        if X.shape[1] == 0:
+            return 0
+
+        # Cuartiles de todas las columnas en una sola pasada vectorizada.
+        with warnings.catch_warnings():
+            # Las columnas completamente nulas producen NaN y no cuentan outliers.
+            warnings.simplefilter('ignore', RuntimeWarning)
+            Q1, Q3 = np.nanquantile(X, [0.25, 0.75], axis=0)
+        IQR = Q3 - Q1
+        lower, upper = Q1 - 1.5 * IQR, Q3 + 1.5 * IQR
+        # Los dos lados son disjuntos: se cuentan por separado sin combinar máscaras.
+        return int(np.count_nonzero(X < lower) + np.count_nonzero(X > upper))
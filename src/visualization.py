@@ -4,8 +4,139 @@ Módulo de Visualización de Datos.
 Este módulo proporciona la clase Visualizer, que utiliza Matplotlib y Seaborn
 para generar diversas gráficas estándar para el análisis exploratorio de datos.
 """
-import matplotlib.pyplot as plt
-import seaborn as sns
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+
+@lru_cache(maxsize=None)
+def _plotting():
+    """
+    Importa Matplotlib (backend Agg) y Seaborn la primera vez que se necesitan.
+
+    Diferir estas importaciones acelera el arranque de la app, que no dibuja
+    nada hasta que se sube un archivo.
+
+    Returns:
+        tuple: (matplotlib.figure.Figure, módulo seaborn).
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib.figure import Figure
+    import seaborn as sns
+    return Figure, sns
+
+# Tamaño máximo de la matriz de correlación que se anota con los valores de cada celda.
+MAX_ANNOTATED_CORR = 20
+
+
+def _downsample_rows(mask, target=500):
+    """
+    Reduce una matriz booleana a `target` filas promediando bloques consecutivos.
+
+    Args:
+        mask (np.ndarray): Matriz booleana (filas x columnas).
+        target (int): Número máximo de filas del resultado.
+
+    Returns:
+        np.ndarray: La matriz original si ya tiene `target` filas o menos; si no,
+            una matriz float32 con la fracción de valores True de cada bloque.
+    """
+    n = mask.shape[0]
+    if n <= target:
+        return mask
+    starts = np.linspace(0, n, target + 1, dtype=np.intp)
+    sums = np.add.reduceat(mask.astype(np.uint8), starts[:-1], axis=0, dtype=np.uint32)
+    return (sums / np.diff(starts)[:, None]).astype(np.float32)
+
+
+# Puntos máximos por columna en los histogramas y boxplots.
+MAX_PLOT_POINTS = 100_000
+
+# Resolución de la rejilla sobre la que se suaviza la curva de densidad.
+_KDE_GRID_BINS = 256
+
+# Por debajo de este número de gráficas, `render_all` no arranca procesos.
+MIN_PARALLEL_PLOTS = 8
+
+
+def _sample_values(values, max_points=MAX_PLOT_POINTS):
+    """
+    Toma una muestra uniforme (con semilla fija y en el orden original) de los valores.
+
+    Args:
+        values (np.ndarray): Valores de la columna.
+        max_points (int): Tamaño máximo de la muestra.
+
+    Returns:
+        np.ndarray: Los mismos valores si no superan `max_points`; si no, la muestra.
+    """
+    if len(values) <= max_points:
+        return values
+    rng = np.random.default_rng(0)
+    return values[np.sort(rng.choice(len(values), max_points, replace=False))]
+
+
+def _histogram_with_kde(ax, values, color):
+    """
+    Dibuja un histograma con su curva de densidad (KDE) a partir de `np.histogram`.
+
+    La KDE se obtiene suavizando con un núcleo gaussiano un histograma fino de
+    `_KDE_GRID_BINS` cubetas, con el ancho de banda de Scott (el mismo que usa
+    Seaborn). El costo depende del número de cubetas y no del de filas, a
+    diferencia de evaluar `gaussian_kde` punto a punto.
+
+    Args:
+        ax (matplotlib.axes.Axes): Ejes donde dibujar.
+        values (np.ndarray): Valores de la columna; los NaN se ignoran.
+        color (str): Color de las barras y de la curva.
+    """
+    values = values[np.isfinite(values)]
+    if values.size == 0:
+        return
+    counts, edges = np.histogram(values, bins="auto")
+    ax.bar(edges[:-1], counts, width=np.diff(edges), align="edge", color=color, alpha=0.5,
+           edgecolor="white", linewidth=1)
+
+    bandwidth = values.std(ddof=1) * values.size ** (-1 / 5) if values.size > 1 else 0.0
+    if not bandwidth > 0:
+        return
+    grid_counts, grid_edges = np.histogram(values, bins=_KDE_GRID_BINS)
+    step = grid_edges[1] - grid_edges[0]
+    # El núcleo cubre ±3 anchos de banda. Se rellena con ceros para suavizar bien los
+    # bordes, pero la curva se recorta al rango de los datos, como en Seaborn.
+    half = int(np.ceil(3 * bandwidth / step))
+    offsets = np.arange(-half, half + 1) * step
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2)
+    padded = np.convolve(np.pad(grid_counts, half), kernel / kernel.sum(), mode="same")
+    density = padded[half:half + grid_counts.size]
+    centers = (grid_edges[:-1] + grid_edges[1:]) / 2
+    # Escala la densidad a la altura de las barras del histograma (conteos por cubeta).
+    bar_width = edges[1] - edges[0]
+    ax.plot(centers, density * bar_width / step, color=color)
+
+
+@lru_cache(maxsize=None)
+def _worker_visualizer():
+    """Visualizer compartido por todas las tareas de un mismo proceso de trabajo."""
+    return Visualizer()
+
+
+def _render_numeric(col, values):
+    """Renderiza en un proceso de trabajo el PNG de distribución de una columna numérica."""
+    viz = _worker_visualizer()
+    return viz.figure_to_png(viz.create_numerical_distributions(None, col, values), close=True)
+
+
+def _render_categorical(col, counts):
+    """Renderiza en un proceso de trabajo el PNG de frecuencias de una columna categórica."""
+    viz = _worker_visualizer()
+    return viz.figure_to_png(viz.create_categorical_count(None, col, counts), close=True)
+
 
 class Visualizer:
     """
@@ -14,77 +145,142 @@ class Visualizer:
     Esta clase encapsula la lógica para generar figuras de Matplotlib, como
     mapas de calor, histogramas, boxplots y gráficos de barras, utilizando
     un estilo consistente de Seaborn.
+
+    Las figuras se construyen con la API orientada a objetos de Matplotlib
+    (sin el estado global de `pyplot`), por lo que pueden generarse en paralelo
+    desde varios hilos.
     """
     def __init__(self):
         """
         Inicializa el Visualizer y establece el tema global para las gráficas.
         """
+        _, sns = _plotting()
         sns.set_theme(style="whitegrid")
 
+    def figure_to_png(self, fig, close=False):
+        """
+        Renderiza una figura a PNG en memoria.
+
+        Usa los mismos parámetros que `st.pyplot` (recorte ajustado, 200 dpi),
+        de modo que el resultado se puede cachear y mostrar con `st.image`.
+
+        Args:
+            fig (matplotlib.figure.Figure): La figura a renderizar.
+            close (bool, optional): Si es True, vacía la figura tras renderizarla.
+                Figura y ejes se referencian entre sí, así que sin esto su memoria
+                solo se libera cuando pasa el recolector de ciclos.
+
+        Returns:
+            bytes: El contenido PNG de la figura.
+        """
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", bbox_inches="tight", dpi=200)
+        if close:
+            fig.clear()
+        return buffer.getvalue()
+
     def create_missing_heatmap(self, df):
         """
         Crea un mapa de calor para visualizar la ubicación de valores faltantes.
 
+        Si el DataFrame tiene más de 500 filas, estas se agrupan en 500 bloques
+        consecutivos y se grafica la fracción de nulos de cada bloque; la
+        imagen resultante es la misma pero con mucha menos data que dibujar.
+
         Args:
             df (pd.DataFrame): El DataFrame a visualizar.
 
         Returns:
             matplotlib.figure.Figure: La figura de Matplotlib con el mapa de calor.
         """
-        fig = plt.figure(figsize=(10, 8.5))
-        sns.heatmap(df.isnull(), cbar=False, yticklabels=False, cmap='viridis')
-        plt.title('Mapa de Valores Faltantes')
-        plt.tight_layout()
+        Figure, sns = _plotting()
+        fig = Figure(figsize=(10, 8.5))
+        ax = fig.subplots()
+        # Con más filas que píxeles, cada celda muestra la fracción de nulos de un bloque de filas.
+        missing = pd.DataFrame(
+            _downsample_rows(df.isnull().to_numpy()), columns=df.columns
+        )
+        # rasterized: la malla se guarda como imagen también al exportar a PDF/SVG.
+        sns.heatmap(missing, cbar=False, yticklabels=False, cmap='viridis', vmin=0, vmax=1,
+                    rasterized=True, ax=ax)
+        ax.set_title('Mapa de Valores Faltantes')
+        fig.tight_layout()
         return fig
 
-    def create_numerical_distributions(self, df, col):
+    def create_numerical_distributions(self, df, col, values=None, max_points=MAX_PLOT_POINTS):
         """
         Crea un histograma y un boxplot para una columna numérica.
 
+        Las columnas con más de `max_points` valores se grafican a partir de una
+        muestra uniforme: la forma de la distribución y los cuartiles son
+        visualmente idénticos, y el histograma cuenta los puntos de la muestra.
+
         Args:
             df (pd.DataFrame): El DataFrame que contiene los datos.
             col (str): El nombre de la columna numérica a visualizar.
+            values (np.ndarray, optional): Valores ya materializados de la columna
+                (p. ej. una columna de la matriz numérica compartida). Si se
+                omiten, se usan los de `df[col]`.
+            max_points (int, optional): Número máximo de puntos a graficar.
 
         Returns:
             matplotlib.figure.Figure: La figura de Matplotlib que contiene
                                       ambas subtramas (histograma y boxplot).
         """
-        fig, axes = plt.subplots(1, 2, figsize=(10, 4))
+        Figure, sns = _plotting()
+        fig = Figure(figsize=(10, 4))
+        axes = fig.subplots(1, 2)
+        if values is None:
+            values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        values = _sample_values(np.asarray(values, dtype=np.float64), max_points)
+        data = pd.Series(values, name=col)
         
         # Histograma con una curva de densidad (KDE)
-        sns.histplot(df[col], kde=True, ax=axes[0], color='skyblue')
+        _histogram_with_kde(axes[0], values, 'skyblue')
+        axes[0].set(xlabel=col, ylabel='Count')
         axes[0].set_title(f'Distribución: {col}')
         
         # Boxplot para visualizar cuartiles y outliers
-        sns.boxplot(x=df[col], ax=axes[1], color='lightgreen')
+        sns.boxplot(x=data, ax=axes[1], color='lightgreen')
         axes[1].set_title(f'Boxplot: {col}')
         
-        plt.tight_layout()
+        fig.tight_layout()
         return fig
 
-    def create_categorical_count(self, df, col):
+    def create_categorical_count(self, df, col, value_counts=None):
         """
         Crea un gráfico de barras para mostrar la frecuencia de cada categoría.
 
         Args:
             df (pd.DataFrame): El DataFrame que contiene los datos.
             col (str): El nombre de la columna categórica a visualizar.
+            value_counts (pd.Series, optional): `df[col].value_counts()` ya
+                calculado. Si se omite, se calcula aquí.
 
         Returns:
             matplotlib.figure.Figure: La figura de Matplotlib con el gráfico de barras.
         """
-        fig = plt.figure(figsize=(8, 4))
-        # Ordena las barras por frecuencia descendente.
-        sns.countplot(x=df[col], palette="viridis", order=df[col].value_counts().index)
-        plt.title(f'Frecuencia: {col}')
-        plt.xticks(rotation=45)
-        plt.tight_layout()
+        Figure, sns = _plotting()
+        fig = Figure(figsize=(8, 4))
+        ax = fig.subplots()
+        # Las barras salen del conteo (ordenado por frecuencia descendente), sin
+        # volver a recorrer la columna.
+        counts = value_counts if value_counts is not None else df[col].value_counts()
+        sns.barplot(x=counts.index, y=counts.to_numpy(), order=counts.index, palette="viridis", ax=ax)
+        ax.set(xlabel=col, ylabel="count")
+        ax.set_title(f'Frecuencia: {col}')
+        ax.tick_params(axis='x', rotation=45)
+        fig.tight_layout()
         return fig
 
     def create_correlation_heatmap(self, corr_matrix):
         """
         Crea un mapa de calor para una matriz de correlación.
 
+        Las celdas solo se anotan con su valor si la matriz tiene como mucho
+        20 columnas; con más, las etiquetas no caben y cada una es un objeto
+        de texto adicional que dibujar.
+
         Args:
             corr_matrix (pd.DataFrame): La matriz de correlación precalculada.
 
@@ -94,8 +290,70 @@ class Visualizer:
         """
         if corr_matrix is None: return None
         
-        fig = plt.figure(figsize=(10, 8))
-        sns.heatmap(corr_matrix, annot=True, fmt=".2f", cmap='coolwarm', center=0)
-        plt.title('Matriz de Correlación (Pearson)')
-        plt.tight_layout()
-        return fig
\ No newline at end of file
+        Figure, sns = _plotting()
+        fig = Figure(figsize=(10, 8))
+        ax = fig.subplots()
+        annot = corr_matrix.shape[0] <= MAX_ANNOTATED_CORR
+        sns.heatmap(corr_matrix, annot=annot, fmt=".2f", cmap='coolwarm', center=0, rasterized=True, ax=ax)
+        ax.set_title('Matriz de Correlación (Pearson)')
+        fig.tight_layout()
+        return fig
+
+    def render_all(self, df, numerical_cols, categorical_cols, num_array=None,
+                   value_counts=None, max_workers=None):
+        """
+        Renderiza a PNG las gráficas de todas las columnas en procesos paralelos.
+
+        Cada figura es independiente, así que se reparten entre varios procesos
+        (uno por núcleo por defecto). A cada proceso solo se le envían los datos
+        de su columna: los valores numéricos o el conteo de categorías, nunca el
+        DataFrame completo. Con menos de `MIN_PARALLEL_PLOTS` gráficas se
+        renderizan en este proceso, porque arrancar los workers cuesta más que
+        dibujarlas.
+
+        Los workers se crean con "forkserver" (o "spawn" donde no existe) y no
+        con "fork": Streamlit ejecuta la app con varios hilos y clonar un
+        proceso con hilos puede dejar bloqueos heredados a medio tomar.
+
+        Args:
+            df (pd.DataFrame): El DataFrame que contiene los datos.
+            numerical_cols (list): Columnas para histograma y boxplot.
+            categorical_cols (list): Columnas para el gráfico de frecuencias.
+            num_array (np.ndarray, optional): Matriz con las columnas de
+                `numerical_cols` en el mismo orden. Si se omite, los valores se
+                toman de `df`.
+            value_counts (dict, optional): `value_counts()` precalculados por
+                columna categórica. Los que falten se calculan aquí.
+            max_workers (int, optional): Número máximo de procesos. Por defecto,
+                uno por núcleo, sin pasar del número de gráficas.
+
+        Returns:
+            tuple: (PNGs de las columnas numéricas, PNGs de las categóricas), cada
+                lista en el orden de las columnas recibidas.
+        """
+        value_counts = value_counts or {}
+        # Se muestrea antes de enviar los valores, para no serializar columnas enteras.
+        num_values = [
+            _sample_values(
+                num_array[:, j] if num_array is not None
+                else df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            )
+            for j, col in enumerate(numerical_cols)
+        ]
+        cat_counts = [
+            value_counts[col] if col in value_counts else df[col].value_counts()
+            for col in categorical_cols
+        ]
+        n_tasks = len(numerical_cols) + len(categorical_cols)
+        if n_tasks < MIN_PARALLEL_PLOTS:
+            return (
+                [_render_numeric(c, v) for c, v in zip(numerical_cols, num_values)],
+                [_render_categorical(c, v) for c, v in zip(categorical_cols, cat_counts)],
+            )
+        max_workers = min(max_workers or os.cpu_count() or 1, n_tasks)
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        with ProcessPoolExecutor(max_workers=max_workers,
+                                 mp_context=multiprocessing.get_context(method)) as ex:
+            num_pngs = ex.map(_render_numeric, numerical_cols, num_values)
+            cat_pngs = ex.map(_render_categorical, categorical_cols, cat_counts)
+            return list(num_pngs), list(cat_pngs)